@@ -64,6 +64,28 @@ logger = logging.getLogger(__name__)
 MODEL_NAME = "dolphin3-qwen25-3b"
 OUTPUT_DIR = Path("outputs")
 
+# Few-shot examples for the calculator prompts. Built once at import and
+# shared by every builder; nothing edits an Example in place (the prompt
+# swap below replaces the whole builder).
+_CALCULATOR_EXAMPLES = (
+    Example(
+        "User: What is 15 plus 27?\n"
+        "{\"thought\": \"I need to add 15 and 27 with the calculator.\", "
+        "\"action\": {\"tool_name\": \"safe_calculator\", \"tool_input\": \"15 + 27\"}}\n"
+        "Observation: 42\n"
+        "{\"thought\": \"The calculator returned 42, so I can answer.\", "
+        "\"action\": {\"tool_name\": \"final_answer\", \"tool_input\": \"42\"}}"
+    ),
+    Example(
+        "User: Calculate 8 times 9\n"
+        "{\"thought\": \"I need to multiply 8 by 9.\", "
+        "\"action\": {\"tool_name\": \"safe_calculator\", \"tool_input\": \"8 * 9\"}}\n"
+        "Observation: 72\n"
+        "{\"thought\": \"The result is 72, so I can answer.\", "
+        "\"action\": {\"tool_name\": \"final_answer\", \"tool_input\": \"72\"}}"
+    ),
+)
+
 
 def build_calculator_prompts() -> PromptBuilder:
     """Create the calculator prompt content: a fresh PromptBuilder, every
@@ -89,27 +111,7 @@ def build_calculator_prompts() -> PromptBuilder:
         )
     )
 
-    builder.examples.append(
-        Example(
-            "User: What is 15 plus 27?\n"
-            "{\"thought\": \"I need to add 15 and 27 with the calculator.\", "
-            "\"action\": {\"tool_name\": \"safe_calculator\", \"tool_input\": \"15 + 27\"}}\n"
-            "Observation: 42\n"
-            "{\"thought\": \"The calculator returned 42, so I can answer.\", "
-            "\"action\": {\"tool_name\": \"final_answer\", \"tool_input\": \"42\"}}"
-        )
-    )
-
-    builder.examples.append(
-        Example(
-            "User: Calculate 8 times 9\n"
-            "{\"thought\": \"I need to multiply 8 by 9.\", "
-            "\"action\": {\"tool_name\": \"safe_calculator\", \"tool_input\": \"8 * 9\"}}\n"
-            "Observation: 72\n"
-            "{\"thought\": \"The result is 72, so I can answer.\", "
-            "\"action\": {\"tool_name\": \"final_answer\", \"tool_input\": \"72\"}}"
-        )
-    )
+    builder.examples.extend(_CALCULATOR_EXAMPLES)
 
     return builder
 
@@ -176,7 +178,9 @@ async def main():
     print("INITIALIZING LLM")
     print("=" * 60)
     
-    llm = HuggingFaceAdapter(MODEL_NAME)
+    # Loading the weights is slow, blocking work; run it in a worker thread
+    # so the event loop is not stalled for the whole load.
+    llm = await asyncio.to_thread(HuggingFaceAdapter, MODEL_NAME)
 
     original_agent = build_calculator_agent(llm, build_calculator_prompts())
     await test_agent(original_agent, "Original Agent")
@@ -185,15 +189,24 @@ async def main():
     print("SAVING AGENT CONFIGURATION")
     print("=" * 60)
     
-    config = save_agent_config(original_agent, str(config_path))
+    # Serializing and writing the config is blocking file I/O; keep it off
+    # the event loop.
+    config = await asyncio.to_thread(save_agent_config, original_agent, str(config_path))
     
-    print(f"\nSaved to: {config_path}")
-    print("\nConfiguration contents:")
-    print(f"• Role: {config['prompts']['role_definition'][:50]}...")
-    print(f"• Tools: {config['agent']['tools']}")
-    print(f"• Examples: {len(config['prompts']['examples'])}")
-    print(f"• Max steps: {config['agent']['max_steps']}")
-    print(f"• Model: {config['model']['model_name']}")
+    # The inspection view is serialized once as JSON, so it is both a single
+    # write and machine-parseable.
+    summary = {
+        "role": config['prompts']['role_definition'][:50],
+        "tools": config['agent']['tools'],
+        "examples": len(config['prompts']['examples']),
+        "max_steps": config['agent']['max_steps'],
+        "model": config['model']['model_name'],
+    }
+    print(
+        f"\nSaved to: {config_path}\n"
+        "\nConfiguration contents:\n"
+        + json.dumps(summary, indent=2, ensure_ascii=False)
+    )
     
     print("\n" + "=" * 60)
     print("LOADING AGENT FROM CONFIGURATION")
@@ -206,11 +219,13 @@ async def main():
     print("INSPECTING CONFIGURATION")
     print("=" * 60)
     
-    config_dict = load_agent_config(str(config_path))
+    config_dict = await asyncio.to_thread(load_agent_config, str(config_path))
 
-    print("\nMetadata:")
-    print(f"Exported at: {config_dict['metadata']['exported_at']}")
-    print(f"Source: {config_dict['metadata']['source']}")
+    metadata = {
+        "exported_at": config_dict['metadata']['exported_at'],
+        "source": config_dict['metadata']['source'],
+    }
+    print("\nMetadata:\n" + json.dumps(metadata, indent=2, ensure_ascii=False, default=str))
 
     await demonstrate_live_prompt_swap(loaded_agent)
     await demonstrate_live_registry_swap(loaded_agent)
@@ -296,4 +311,12 @@ async def demonstrate_live_registry_swap(agent: SimpleAgent):
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    # uvloop is optional (and unavailable on Windows); fall back to the
+    # default event loop when it is not installed.
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main())
\ No newline at end of file
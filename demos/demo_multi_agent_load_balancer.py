@@ -5,7 +5,8 @@
 ================================================================================
 
 This demo showcases multiple fair_llm agents running in PARALLEL, all hitting
-the same vllm_load_manager backend simultaneously.
+the vllm_load_manager backend simultaneously. When MANAGER_URLS lists more
+than one manager, agents are spread across them round-robin.
 
 It demonstrates:
 - Multiple agents sharing a distributed LLM infrastructure
@@ -41,12 +42,21 @@ PREREQUISITES:
 1. vllm_load_manager running
 2. At least one vllm_load_node registered
 3. Model available in supported models list
+
+USAGE:
+======
+    python demos/demo_multi_agent_load_balancer.py
+    python demos/demo_multi_agent_load_balancer.py --num-agents 16 \\
+        --managers host1:8123,host2:8123 --tasks-file tasks.txt
 """
 
+import argparse
 import asyncio
 import time
+from pathlib import Path
 
 from fairlib import (
+    AgentEventBus,
     LoadBalancerAdapter,
     ToolRegistry,
     SafeCalculatorTool,
@@ -56,23 +66,53 @@ from fairlib import (
     SimpleReActPlanner,
     RoleDefinition
 )
+from fairlib.core.events import ModelInvocationEvent
 
 # =============================================================================
 # CONFIGURATION - Modify these as needed
 # =============================================================================
-MANAGER_IP = "localhost"
-MANAGER_PORT = 8123
+# One or more vllm_load_manager endpoints ("host:port"). Agents are assigned
+# to managers round-robin, so adding managers spreads the parallel fan-out.
+MANAGER_URLS = ["localhost:8123"]
 MODEL = "mistralai/Mistral-7B-Instruct-v0.3"
 NUM_AGENTS = 4
 # =============================================================================
 
+# Preset tasks - each agent gets a different math problem
+DEFAULT_TASKS = [
+    "What is 25 * 17?",
+    "Calculate 144 / 12 + 50",
+    "What is 99 + 101?",
+    "Compute 15 * 15 - 25",
+]
+
+def parse_manager_url(url: str) -> tuple[str, int]:
+    """
+    Split a "host:port" manager endpoint into its IP and port.
+
+    Raises:
+        ValueError: If the endpoint is not a bare host and a port number.
+    """
+    host, _, port = url.strip().rpartition(":")
+    if not host or "/" in host or not port.isdigit() or not 0 < int(port) < 65536:
+        raise ValueError(f"invalid manager {url.strip()!r}: expected host:port, e.g. localhost:8123")
+    return host, int(port)
+
+
+def load_tasks(tasks_file: str) -> list[str]:
+    """Read one task per non-blank line from a text file."""
+    lines = Path(tasks_file).read_text(encoding="utf-8").splitlines()
+    return [line.strip() for line in lines if line.strip()]
 
-def create_calculator_agent(llm, agent_id: int) -> SimpleAgent:
-    """Create a calculator agent with a unique ID."""
-    tool_registry = ToolRegistry()
-    tool_registry.register_tool(SafeCalculatorTool())
 
-    executor = ToolExecutor(tool_registry)
+def create_calculator_agent(
+    llm,
+    agent_id: int,
+    tool_registry: ToolRegistry,
+    executor: ToolExecutor,
+    events: AgentEventBus,
+) -> SimpleAgent:
+    """Create a calculator agent with a unique ID on the shared tools."""
     memory = WorkingMemory()
 
     planner = SimpleReActPlanner(llm, tool_registry)
@@ -86,7 +126,9 @@ def create_calculator_agent(llm, agent_id: int) -> SimpleAgent:
         planner=planner,
         tool_executor=executor,
         memory=memory,
-        max_steps=5
+        max_steps=5,
+        stateless=True,  # An agent may pick up several tasks from the queue
+        events=events,
     )
 
 
@@ -106,42 +148,85 @@ async def run_agent(agent: SimpleAgent, agent_id: int, task: str) -> dict:
         return {"agent_id": agent_id, "task": task, "response": str(e), "time": elapsed, "success": False}
 
 
-async def main():
+async def run_worker(
+    agent: SimpleAgent,
+    agent_id: int,
+    queue: asyncio.Queue,
+    results: list,
+) -> None:
+    """Pull (index, task) pairs off the shared queue until it is drained."""
+    while True:
+        try:
+            index, task = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        results[index] = await run_agent(agent, agent_id, task)
+
+
+async def main(num_agents: int, managers: list[tuple[str, int]], tasks: list[str]):
     print("=" * 70)
     print("       Multi-Agent Load Balancer Demo")
     print("=" * 70)
-    print(f"Manager: http://{MANAGER_IP}:{MANAGER_PORT}")
+    print(f"Managers: {', '.join(f'http://{host}:{port}' for host, port in managers)}")
     print(f"Model: {MODEL}")
-    print(f"Agents: {NUM_AGENTS}")
+    print(f"Agents: {num_agents}")
+    print(f"Tasks: {len(tasks)}")
     print("=" * 70)
 
-    # Initialize the load balancer adapter
-    print("\nConnecting to vllm_load_manager...")
-    llm = LoadBalancerAdapter(
-        manager_ip=MANAGER_IP,
-        port=MANAGER_PORT,
-        model=MODEL,
-        timeout=900,
-        verbose=True,
-        preload_model=True
-    )
+    # Initialize one load balancer adapter per manager. The constructor
+    # checks the model against the manager and, with preload_model=True,
+    # has the manager load it before returning - all blocking HTTP. The
+    # adapters are built concurrently in worker threads, so the managers
+    # load in parallel instead of one after another.
+    print("\nConnecting to vllm_load_manager and preloading the model...")
+    llms = await asyncio.gather(*[
+        asyncio.to_thread(
+            LoadBalancerAdapter,
+            manager_ip=manager_ip,
+            port=port,
+            model=MODEL,
+            timeout=900,
+            verbose=True,
+            preload_model=True,
+        )
+        for manager_ip, port in managers
+    ])
 
-    # Show cluster status
+    # Poll health after the preload, so the status shows the loaded nodes.
+    # get_health_status() is a blocking HTTP call; the polls run in threads.
+    statuses = await asyncio.gather(*[asyncio.to_thread(llm.get_health_status) for llm in llms])
     print("\nCluster Status:")
-    for node, info in llm.get_health_status().items():
-        print(f"  {node}: {info.get('status')} | Model: {info.get('model')}")
-
-    # Preset tasks - each agent gets a different math problem
-    tasks = [
-        "What is 25 * 17?",
-        "Calculate 144 / 12 + 50",
-        "What is 99 + 101?",
-        "Compute 15 * 15 - 25",
-    ]
+    for llm, status in zip(llms, statuses):
+        print(f"  Manager {llm.base_url}")
+        for node, info in status.items():
+            print(f"    {node}: {info.get('status')} | Model: {info.get('model')}")
 
     # Create agents
-    print(f"\nCreating {NUM_AGENTS} agents...")
-    agents = [create_calculator_agent(llm, i + 1) for i in range(NUM_AGENTS)]
+    print(f"\nCreating {num_agents} agents...")
+    # Every agent uses the same tools, and neither the registry nor the
+    # executor holds per-run state, so one pair is shared by all agents. An
+    # executor serves a single event bus, so the agents share that bus too.
+    tool_registry = ToolRegistry()
+    tool_registry.register_tool(SafeCalculatorTool())
+    events = AgentEventBus()
+    executor = ToolExecutor(tool_registry, events=events)
+    agents = [
+        create_calculator_agent(
+            llms[i % len(llms)], i + 1, tool_registry, executor, events
+        )
+        for i in range(num_agents)
+    ]
+
+    # Every model call reports its token usage on the shared event bus;
+    # summing the completion tokens gives the aggregate generation rate.
+    completion_tokens = 0
+
+    def count_tokens(event: ModelInvocationEvent) -> None:
+        nonlocal completion_tokens
+        if event.usage is not None and event.usage.completion_tokens:
+            completion_tokens += event.usage.completion_tokens
+
+    events.subscribe(ModelInvocationEvent, count_tokens)
 
     # Run ALL agents in parallel
     print("\n" + "=" * 70)
@@ -150,8 +235,18 @@ async def main():
 
     start_time = time.time()
 
-    results = await asyncio.gather(*[
-        run_agent(agent, i + 1, tasks[i % len(tasks)])
+    # Tasks go on a shared queue and each agent pulls the next one as soon as
+    # it is free, so a slow task does not leave the other agents idle.
+    # Results are stored by task index to keep the input order. Every task
+    # runs at least once, and tasks repeat until each agent has one.
+    jobs = [tasks[i % len(tasks)] for i in range(max(num_agents, len(tasks)))]
+    queue: asyncio.Queue = asyncio.Queue()
+    for index, task in enumerate(jobs):
+        queue.put_nowait((index, task))
+    results: list = [None] * len(jobs)
+
+    await asyncio.gather(*[
+        run_worker(agent, i + 1, queue, results)
         for i, agent in enumerate(agents)
     ])
 
@@ -162,23 +257,55 @@ async def main():
     print("RESULTS")
     print("=" * 70)
 
-    for r in results:
-        status = "OK" if r["success"] else "FAIL"
-        print(f"\nAgent {r['agent_id']} [{status}] ({r['time']:.2f}s)")
-        print(f"  Task: {r['task']}")
-        print(f"  Answer: {str(r['response'])[:100]}")
+    # Build the whole report first and write it in one call
+    blocks = [
+        f"Agent {r['agent_id']} [{'OK' if r['success'] else 'FAIL'}] ({r['time']:.2f}s)\n"
+        f"  Task: {r['task']}\n"
+        f"  Answer: {str(r['response'])[:100]}"
+        for r in results
+    ]
+    print("\n" + "\n\n".join(blocks))
 
     # Stats
     successful = sum(1 for r in results if r["success"])
     print("\n" + "=" * 70)
     print("SUMMARY")
     print("=" * 70)
-    print(f"  Agents: {NUM_AGENTS}")
-    print(f"  Successful: {successful}/{NUM_AGENTS}")
+    print(f"  Agents: {num_agents}")
+    print(f"  Successful: {successful}/{len(results)}")
     print(f"  Total Time: {total_time:.2f}s")
-    print(f"  Avg per Agent: {total_time / NUM_AGENTS:.2f}s (parallel)")
+    print(f"  Avg per Task: {total_time / len(results):.2f}s (parallel)")
+    if completion_tokens:
+        print(f"  Throughput: {completion_tokens / total_time:.1f} tokens/sec")
     print("=" * 70)
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # Setup command-line argument parsing
+    parser = argparse.ArgumentParser(description="Multi-Agent Load Balancer Demo")
+    parser.add_argument("--num-agents", type=int, default=NUM_AGENTS, help="Number of agents to run in parallel.")
+    parser.add_argument("--tasks-file", type=str, default=None, help="Optional: text file with one task per line.")
+    parser.add_argument("--managers", type=str, default=",".join(MANAGER_URLS), help="Comma-separated host:port list of load managers.")
+    args = parser.parse_args()
+
+    try:
+        tasks = load_tasks(args.tasks_file) if args.tasks_file else DEFAULT_TASKS
+    except (OSError, ValueError) as e:
+        parser.error(f"cannot read --tasks-file: {e}")
+    manager_urls = [url for url in args.managers.split(",") if url.strip()]
+    if args.num_agents < 1 or not tasks or not manager_urls:
+        parser.error("need at least one agent, one task, and one manager")
+    try:
+        managers = [parse_manager_url(url) for url in manager_urls]
+    except ValueError as e:
+        parser.error(str(e))
+
+    # uvloop is optional (and unavailable on Windows); fall back to the
+    # default event loop when it is not installed.
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main(args.num_agents, managers, tasks))
+    else:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main(args.num_agents, managers, tasks))
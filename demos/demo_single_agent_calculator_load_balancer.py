@@ -83,7 +83,9 @@ async def main():
     # --- Step 4: Run the Interaction Loop ---
     while True:
         try:
-            user_input = input("\n👤 You: ")
+            # Read stdin off the event loop so it stays free while the user
+            # is typing.
+            user_input = await asyncio.to_thread(input, "\n👤 You: ")
             if user_input.lower() in ["exit", "quit"]:
                 print("🤖 Agent: Goodbye!")
                 break
@@ -92,11 +94,20 @@ async def main():
             print(f"LLM Raw Output:\n{agent_response}")
             print(f"🤖 Agent: {agent_response}")
 
-        except KeyboardInterrupt:
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl-C into a cancellation of main()
             print("\n🤖 Agent: Exiting...")
             break
 
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    # uvloop is optional (and unavailable on Windows); fall back to the
+    # default event loop when it is not installed.
+    try:
+        import uvloop
+    except ImportError:
+        asyncio.run(main())
+    else:
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            runner.run(main())
 
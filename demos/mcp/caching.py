@@ -0,0 +1,472 @@
+# caching.py
+"""
+Caches shared by the MCP demos.
+
+SemanticCache answers a query from an earlier run when a stored query means
+the same thing, so near-duplicate questions ("what is MCP" / "what's MCP?")
+skip the whole agent loop - no model decode and no tool calls.
+
+CachedMCPToolRegistry is an MCPToolRegistry whose tools answer a repeated
+call (same tool, same arguments) from memory instead of another round trip
+to the MCP server.
+
+The demos import this module as a sibling script (python demos/mcp/<demo>.py
+puts this directory on sys.path).
+"""
+import asyncio
+import json
+import os
+import re
+import sqlite3
+import tempfile
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from fairlib.core.events import ToolCallPostEvent
+from fairlib.core.interfaces.tools import AbstractTool, TextResult
+from fairlib.modules.mcp.client.mcp_tool_registry import MCPToolRegistry
+
+# Root for everything the demo caches write to disk.
+CACHE_DIR = Path.home() / ".cache" / "fairlib"
+
+# Words dropped from search queries before they are used as cache keys, so
+# "latest AI trends in 2025" and "the latest AI trends 2025" share an entry.
+_SEARCH_STOPWORDS = frozenset(
+    "a an and are for how in is of on the to what when where which who why with".split()
+)
+
+# How the demo MCP servers start a result that reports a failure.
+_ERROR_PREFIXES = ("Error", "Unknown tool")
+
+
+# Numbers, file names and paths in a query; a semantic hit must carry the
+# same ones.
+_LITERAL = re.compile(r"[\w-]*(?:[./\\][\w-]+)+|\d+")
+
+# Tool calls made by the SemanticCache.arun run in progress in this task.
+_run_tool_calls: ContextVar[Optional[list]] = ContextVar("_run_tool_calls", default=None)
+
+
+class SemanticCache:
+    """
+    Final-answer cache keyed on the meaning of the query.
+
+    A lookup embeds the query with a small sentence-transformer and compares
+    it with every stored query by cosine similarity; the closest one is a hit
+    when it clears the threshold and both queries contain the same numbers,
+    file names and paths ("25 * 4" never answers "25 * 5", nor "read a.py"
+    "read b.py"). Entries expire after ttl seconds and are stored in one
+    SQLite file per model name (and scope), so answers produced by one model
+    are never served for another. Each new entry is one appended row, not a
+    rewrite of the whole cache, and a restart loads every live row back with
+    a single query.
+
+    arun only caches answers worth repeating: a run that raised (including
+    one that hit max_steps), had a tool call fail or return an error, or
+    called one of uncached_tools is not stored.
+
+    Usage mirrors a plain agent call:
+        cache = SemanticCache(llm.model_name)
+        answer = await cache.arun(agent, query)
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        threshold: float = 0.92,
+        embedder=None,
+        scope: str = "",
+        ttl: float = 24 * 3600,
+        uncached_tools=(),
+    ):
+        """
+        Args:
+            model_name:     Name of the model whose answers are cached.
+            threshold:      Minimum cosine similarity for a hit.
+            embedder:       Optional embedder; defaults to SentenceTransformerEmbedder.
+            scope:          Optional extra key for the cache file, e.g. a digest of
+                            the agent's tool names, so answers are only reused by
+                            agents that can do the same things.
+            ttl:            Seconds an answer stays valid.
+            uncached_tools: Names of tools whose results can change between
+                            runs (e.g. filesystem reads); an answer from a run
+                            that called one is not cached.
+
+        Raises:
+            Exception: If no embedder is given and the default one cannot be
+                       loaded (sentence-transformers missing, or the model
+                       not downloaded on an offline machine).
+        """
+        self.model_name = model_name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.uncached_tools = frozenset(uncached_tools)
+        if embedder is None:
+            # Imported here: sentence-transformers pulls in torch, which
+            # the tool cache alone does not need.
+            from fairlib import SentenceTransformerEmbedder
+
+            embedder = SentenceTransformerEmbedder()
+        self.embedder = embedder
+        safe_name = re.sub(r"[^\w.-]", "_", f"{model_name}-{scope}" if scope else model_name)
+        self.path = CACHE_DIR / "semantic" / f"{safe_name}.sqlite3"
+
+        self._queries: list[str] = []
+        self._answers: list[str] = []
+        # Unit-length query embeddings, one row per entry
+        self._vectors: Optional[np.ndarray] = None
+        # When each entry was stored (time.time()), one per entry
+        self._stored_at = np.empty(0)
+        # Text -> embedding for stored and pre-embedded queries, so a query
+        # seen before is never sent to the embedder again
+        self._embedded: dict[str, np.ndarray] = {}
+        self._load()
+
+    def __len__(self) -> int:
+        return len(self._queries)
+
+    async def get(self, query: str) -> Optional[str]:
+        """Return the cached answer for a query with the same meaning, if any."""
+        return self._lookup(query, await self._embed(query))
+
+    async def put(self, query: str, answer: str) -> None:
+        """Store an answer for a query and write it to disk."""
+        stored_at = time.time()
+        self._add(query, await self._embed(query), answer, stored_at)
+        await self._save([(query, answer, stored_at)])
+
+    async def put_many(self, items: list[tuple[str, str]]) -> None:
+        """Store (query, answer) pairs, embedding the new queries in one batch."""
+        await self.embed_many([query for query, _ in items])
+        stored_at = time.time()
+        for query, answer in items:
+            self._add(query, self._embedded[query], answer, stored_at)
+        await self._save([(query, answer, stored_at) for query, answer in items])
+
+    async def embed_many(self, texts: list[str]) -> None:
+        """
+        Embed queries ahead of time in a single batch.
+
+        Only texts that have not been embedded yet go to the model; later
+        lookups for any of these texts skip the embedder entirely.
+        """
+        uncached = [text for text in dict.fromkeys(texts) if text not in self._embedded]
+        if not uncached:
+            return
+        vectors = np.asarray(await self.embedder.aembed_documents(uncached), dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors = vectors / np.where(norms == 0, 1, norms)
+        self._embedded.update(zip(uncached, vectors))
+
+    async def arun(self, agent, query: str) -> str:
+        """Answer from the cache, or run the agent and cache its answer."""
+        # One embedding serves both the lookup and the insert on a miss.
+        vector = await self._embed(query)
+        answer = self._lookup(query, vector)
+        if answer is not None:
+            return answer
+
+        # Record this run's tool calls. The buses may be shared with other
+        # runs in flight (a batch), so the callback only keeps calls made
+        # from this run's task, or tasks it started.
+        calls: list[ToolCallPostEvent] = []
+
+        def record(event: ToolCallPostEvent) -> None:
+            if _run_tool_calls.get() is calls:
+                calls.append(event)
+
+        token = _run_tool_calls.set(calls)
+        buses = _event_buses(agent)
+        handles = [bus.subscribe(ToolCallPostEvent, record) for bus in buses]
+        try:
+            answer = await agent.arun(query)
+        finally:
+            for bus, handle in zip(buses, handles):
+                bus.unsubscribe(handle)
+            _run_tool_calls.reset(token)
+
+        if self._cacheable(calls):
+            stored_at = time.time()
+            self._add(query, vector, answer, stored_at)
+            await self._save([(query, answer, stored_at)])
+        return answer
+
+    def _cacheable(self, calls: list[ToolCallPostEvent]) -> bool:
+        """Whether an answer built from these tool calls can be served again."""
+        return not any(
+            not call.succeeded
+            or call.tool_name in self.uncached_tools
+            or call.observation.lstrip().startswith(_ERROR_PREFIXES)
+            for call in calls
+        )
+
+    async def _embed(self, text: str) -> np.ndarray:
+        if text in self._embedded:
+            return self._embedded[text]
+        # Encoding is blocking model work; aembed_query runs it in a thread.
+        vector = np.asarray(await self.embedder.aembed_query(text), dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup(self, query: str, vector: np.ndarray) -> Optional[str]:
+        if self._vectors is None:
+            return None
+        # Rows are unit length, so the dot product is the cosine similarity.
+        scores = self._vectors @ vector
+        scores[self._stored_at <= time.time() - self.ttl] = -np.inf
+        best = int(np.argmax(scores))
+        if scores[best] < self.threshold:
+            return None
+        # Embeddings barely separate queries that differ only in a number or
+        # a file name.
+        if _LITERAL.findall(self._queries[best]) != _LITERAL.findall(query):
+            return None
+        print(f"(semantic cache hit: {scores[best]:.2f} similar to {self._queries[best]!r})")
+        return self._answers[best]
+
+    def _add(self, query: str, vector: np.ndarray, answer: str, stored_at: float) -> None:
+        self._embedded[query] = vector
+        self._queries.append(query)
+        self._answers.append(answer)
+        self._stored_at = np.append(self._stored_at, stored_at)
+        row = vector[np.newaxis, :]
+        self._vectors = row if self._vectors is None else np.vstack([self._vectors, row])
+
+    def _connect(self) -> sqlite3.Connection:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers "
+            "(query TEXT NOT NULL, answer TEXT NOT NULL, vector BLOB NOT NULL, "
+            "stored_at REAL NOT NULL)"
+        )
+        return conn
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        cutoff = time.time() - self.ttl
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute("DELETE FROM answers WHERE stored_at <= ?", (cutoff,))
+            rows = conn.execute(
+                "SELECT query, answer, vector, stored_at FROM answers ORDER BY rowid"
+            ).fetchall()
+        finally:
+            conn.close()
+        if not rows:
+            return
+        self._queries = [row[0] for row in rows]
+        self._answers = [row[1] for row in rows]
+        self._vectors = np.stack([np.frombuffer(row[2], dtype=np.float32) for row in rows])
+        self._stored_at = np.array([row[3] for row in rows])
+        self._embedded.update(zip(self._queries, self._vectors))
+
+    async def _save(self, items: list[tuple[str, str, float]]) -> None:
+        # Rows are built on the event loop and inserted in a thread: the
+        # write is blocking I/O.
+        rows = [
+            (query, answer, self._embedded[query].tobytes(), stored_at)
+            for query, answer, stored_at in items
+        ]
+        await asyncio.to_thread(self._insert, rows)
+
+    def _insert(self, rows: list[tuple[str, str, bytes, float]]) -> None:
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany("INSERT INTO answers VALUES (?, ?, ?, ?)", rows)
+        finally:
+            conn.close()
+
+
+def _event_buses(agent) -> list:
+    """
+    Return the event buses an agent's tool calls are emitted on.
+
+    A team runner has no tools of its own; its manager and each worker emit
+    on their own buses.
+    """
+    workers = getattr(agent, "workers", None) or {}
+    if isinstance(workers, dict):
+        workers = workers.values()
+    buses = []
+    for member in (agent, getattr(agent, "manager_agent", None), *workers):
+        bus = getattr(member, "events", None)
+        if bus is not None and all(bus is not seen for seen in buses):
+            buses.append(bus)
+    return buses
+
+
+class CachedMCPToolRegistry(MCPToolRegistry):
+    """
+    MCPToolRegistry that memoizes tool results for read-only servers.
+
+    Results are kept in an LRU keyed by (prefixed tool name, arguments as
+    canonical JSON) and expire after cache_ttl seconds. Text arguments are
+    whitespace-collapsed; with normalize_text=True (search servers) they are
+    also lowercased, stripped of punctuation and stopwords, and word-sorted.
+    Lookups are exact matches on that key only: near-miss inputs ("2024" /
+    "2025", "vulnerable" / "not vulnerable") ask different questions. With
+    file_root set, a call that names a "path" is also keyed on that file's
+    modification time, so an edited file is read again. Tools named in
+    uncached_tools (server tool names) always go to the server. With
+    persist=True the cache is written to ~/.cache/fairlib/mcp/<tool_prefix>.json
+    and reloaded on the next start. Results that report an error are
+    returned but not cached.
+
+    Only cache servers whose tools do not change anything: a repeated call
+    is never sent to the server.
+    """
+
+    def __init__(
+        self,
+        tool_prefix: str = "mcp",
+        cache_ttl: float = 3600,
+        cache_max_size: int = 1000,
+        file_root: Optional[str] = None,
+        persist: bool = False,
+        normalize_text: bool = False,
+        uncached_tools=(),
+    ):
+        super().__init__(tool_prefix=tool_prefix)
+        self.cache_ttl = cache_ttl
+        self.cache_max_size = cache_max_size
+        self.file_root = file_root
+        self.normalize_text = normalize_text
+        self.uncached_tools = frozenset(uncached_tools)
+        self.cache_path = CACHE_DIR / "mcp" / f"{tool_prefix}.json" if persist else None
+        # key -> (stored_at, result text), least recently used first
+        self._results: OrderedDict[str, tuple[float, str]] = OrderedDict()
+        # Wrappers are built once per adapter, not on every lookup
+        self._wrapped: dict[int, "_CachedMCPTool"] = {}
+        # One save at a time, so an older snapshot never replaces a newer one
+        self._save_lock = asyncio.Lock()
+        self._load()
+
+    def get_all_tools(self) -> dict[str, AbstractTool]:
+        """Get all registered tools, each answering repeat calls from the cache."""
+        tools = {}
+        for name, tool in super().get_all_tools().items():
+            wrapped = self._wrapped.get(id(tool))
+            if wrapped is None or wrapped.tool is not tool:
+                wrapped = self._wrapped[id(tool)] = _CachedMCPTool(tool, self)
+            tools[name] = wrapped
+        return tools
+
+    async def call(self, tool: AbstractTool, tool_input) -> TextResult:
+        """Run a tool call through the cache."""
+        if getattr(tool, "mcp_tool_name", tool.name) in self.uncached_tools:
+            return await tool.acall(tool_input)
+        arguments = tool_input.model_dump(exclude_none=True, by_alias=True)
+        key = self._key(tool.name, arguments)
+
+        hit = self._lookup(key)
+        if hit is not None:
+            return TextResult(result=hit)
+
+        output = await tool.acall(tool_input)
+        if self._store(key, output.result):
+            await self._save()
+        return output
+
+    def _store(self, key: str, result: str) -> bool:
+        """Cache a result; returns False (and caches nothing) for an error."""
+        # MCP servers report failures as ordinary text, and a transient one
+        # (a timeout, a rate limit) must not be served for the whole TTL.
+        if result.lstrip().startswith(_ERROR_PREFIXES):
+            return False
+        self._results[key] = (time.time(), result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.cache_max_size:
+            self._results.popitem(last=False)
+        return True
+
+    def _lookup(self, key: str) -> Optional[str]:
+        entry = self._results.get(key)
+        if entry is None or time.time() - entry[0] >= self.cache_ttl:
+            return None
+        self._results.move_to_end(key)
+        return entry[1]
+
+    def _canonicalize(self, value):
+        if not isinstance(value, str):
+            return value
+        value = re.sub(r"\s+", " ", value.strip())
+        if self.normalize_text:
+            # Version numbers stay whole, so "3.11" and "11.3" stay apart
+            words = re.findall(r"\d+(?:\.\d+)*|\w+", value.lower())
+            value = " ".join(sorted(w for w in words if w not in _SEARCH_STOPWORDS))
+        return value
+
+    def _key(self, tool_name: str, arguments: dict) -> str:
+        key = [tool_name, {name: self._canonicalize(v) for name, v in arguments.items()}]
+        path = arguments.get("path")
+        if self.file_root is not None and isinstance(path, str):
+            try:
+                key.append(os.path.getmtime(os.path.join(self.file_root, path)))
+            except OSError:
+                key.append(None)
+        return json.dumps(key, sort_keys=True, ensure_ascii=False)
+
+    def _load(self) -> None:
+        if self.cache_path is None or not self.cache_path.exists():
+            return
+        # A truncated or hand-edited file just means starting with an empty cache
+        try:
+            entries = json.loads(self.cache_path.read_text(encoding="utf-8"))
+            now = time.time()
+            loaded = {
+                key: (stored_at, result)
+                for key, (stored_at, result) in entries.items()
+                if now - stored_at < self.cache_ttl
+            }
+        except (OSError, ValueError, TypeError, AttributeError):
+            return
+        self._results.update(loaded)
+
+    async def _save(self) -> None:
+        if self.cache_path is None:
+            return
+        async with self._save_lock:
+            text = json.dumps(self._results, ensure_ascii=False)
+            await asyncio.to_thread(self._write, text)
+
+    def _write(self, text: str) -> None:
+        # Write a temporary file and rename it over the cache, so a crash
+        # mid-write leaves the previous file intact rather than half of one.
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.cache_path.parent, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp, self.cache_path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+
+
+class _CachedMCPTool(AbstractTool):
+    """Stands in for one MCP tool and sends its calls through the registry cache."""
+
+    def __init__(self, tool: AbstractTool, registry: CachedMCPToolRegistry):
+        self.tool = tool
+        self.registry = registry
+        # The executor reads the tool contract straight off the instance
+        for attr in (
+            "name", "description", "input_schema", "output_schema", "side_effect",
+            "required_capability", "reaches_network", "network_egress",
+        ):
+            setattr(self, attr, getattr(tool, attr))
+
+    def __getattr__(self, attr):
+        # Everything else (mcp_server_name, mcp_tool_name, ...) comes from the adapter
+        return getattr(self.tool, attr)
+
+    async def acall(self, tool_input) -> TextResult:
+        return await self.registry.call(self.tool, tool_input)
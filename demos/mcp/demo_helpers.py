@@ -0,0 +1,127 @@
+# demo_helpers.py
+"""
+Small helpers shared by the MCP demos.
+
+The demos import this module as a sibling script (python demos/mcp/<demo>.py
+puts this directory on sys.path).
+"""
+import asyncio
+import os
+import sys
+import threading
+
+from fairlib import SimpleAgent, WorkingMemory
+
+# Bytes read from stdin but not yet returned: a paste can deliver several
+# lines in one read.
+_stdin_buffer = bytearray()
+
+
+def _read_line() -> str:
+    """
+    Read one line from stdin (blocking).
+
+    Raises:
+        EOFError: When stdin is closed or has no readable file descriptor.
+    """
+    while b"\n" not in _stdin_buffer:
+        try:
+            chunk = os.read(sys.stdin.fileno(), 4096)
+        except (OSError, ValueError) as e:
+            # A closed or redirected stdin (no fileno, EBADF) will never
+            # produce a line; callers' loops treat EOFError as "quit" rather
+            # than prompting again forever.
+            raise EOFError from e
+        if not chunk:
+            if not _stdin_buffer:
+                raise EOFError
+            break
+        _stdin_buffer.extend(chunk)
+    line, _, rest = bytes(_stdin_buffer).partition(b"\n")
+    _stdin_buffer[:] = rest
+    return line.decode(errors="replace").rstrip("\r")
+
+
+async def ainput(prompt: str = "") -> str:
+    """
+    input() that leaves the event loop free while the user types.
+
+    The read runs in its own daemon thread rather than through
+    asyncio.to_thread: asyncio.run joins the default executor's threads on
+    exit, so a Ctrl-C at the prompt would hang until Enter was pressed. The
+    thread reads the file descriptor directly, because a daemon thread left
+    blocked inside input() holds stdin's lock and aborts interpreter
+    shutdown.
+
+    Raises:
+        EOFError: When stdin is closed.
+    """
+    print(prompt, end="", flush=True)
+    if b"\n" in _stdin_buffer:
+        return _read_line()
+
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result, error) -> None:
+        if future.cancelled():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def read() -> None:
+        try:
+            result, error = _read_line(), None
+        except Exception as e:
+            result, error = None, e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            # The loop closed while the user was typing.
+            pass
+
+    threading.Thread(target=read, daemon=True).start()
+    return await future
+
+
+def fork_agent(agent):
+    """
+    Return a SimpleAgent that shares agent's parts but has its own memory.
+
+    Concurrent runs each need one, so they cannot see each other's steps;
+    the model, planner, executor, step limit and event bus are shared.
+    """
+    return SimpleAgent(
+        llm=agent.llm,
+        planner=agent.planner,
+        tool_executor=agent.tool_executor,
+        memory=WorkingMemory(),
+        max_steps=agent.max_steps,
+        stateless=True,
+        events=agent.events,
+    )
+
+
+async def load_alongside(load, setup, cleanup):
+    """
+    Run the blocking load() in a worker thread while the setup coroutine runs
+    on the event loop, and return (load(), setup's result).
+
+    With asyncio.gather a failed load escapes while setup carries on, and the
+    connections it makes are never closed. Here, if load raises (or the wait
+    is cancelled by Ctrl-C), a setup still running is cancelled and a
+    finished one has its result passed to the async cleanup() before the
+    error propagates.
+    """
+    task = asyncio.ensure_future(setup)
+    try:
+        loaded = await asyncio.to_thread(load)
+    except BaseException:
+        if not task.done():
+            task.cancel()
+        elif not task.cancelled() and task.exception() is None:
+            await cleanup(task.result())
+        raise
+    return loaded, await task
@@ -46,27 +46,45 @@ PREREQUISITES:
      --name brave-search-mcp shoofio/brave-search-mcp-sse:latest
 """
 import asyncio
+import hashlib
 import os
 import sys
+from functools import lru_cache
 
 from fairlib import (
-    HuggingFaceAdapter,
     ToolExecutor,
     WorkingMemory,
     SimpleReActPlanner,
     SimpleAgent,
     MCPServerConfig,
+    settings,
 )
 from fairlib.core.prompts import PromptBuilder, RoleDefinition, Example
 
+from caching import CachedMCPToolRegistry, SemanticCache
+from demo_helpers import ainput, fork_agent, load_alongside
+
 # Default Brave Search SSE URL
 DEFAULT_BRAVE_SSE_URL = "http://localhost:8080/sse"
 
+# How many queries of a /batch run may be in flight at once
+AGENT_CONCURRENCY = int(os.environ.get("AGENT_CONCURRENCY", "4"))
+
+# FAIR_LLM_DEMO_QUANTIZED=1 loads 4-bit weights (bitsandbytes, CUDA only);
+# decoding is bound by memory bandwidth, so fewer bytes per weight means
+# faster tokens. Off by default so the demo also runs on CPU.
+QUANTIZED = os.environ.get("FAIR_LLM_DEMO_QUANTIZED", "").lower() in ("1", "true", "yes")
+
 
+@lru_cache(maxsize=1)
 def create_research_agent_prompt_builder():
     """
     Create a prompt builder for a research agent.
 
+    The builder is built once and shared by every planner. Planners never
+    edit the builder they are given (they merge their format rules into a
+    private copy), so sharing it is safe.
+
     This uses the STANDARD tool_input format (simple strings).
     MCP tools look exactly the same as any other tool to the agent -
     the MCPToolAdapter handles converting simple strings to the
@@ -107,59 +125,93 @@ def create_research_agent_prompt_builder():
     return builder
 
 
+async def _setup_brave(cache_ttl: float, cache_max_size: int):
+    """Connect to Brave Search over SSE and return its registry."""
+    sse_url = os.environ.get("BRAVE_MCP_SSE_URL", DEFAULT_BRAVE_SSE_URL)
+    brave_config = MCPServerConfig(
+        name="brave-search",
+        transport="sse",
+        url=sse_url,
+        timeout=30
+    )
+    brave_registry = CachedMCPToolRegistry(
+        tool_prefix="brave",
+        cache_ttl=cache_ttl,
+        cache_max_size=cache_max_size,
+        persist=True,
+        normalize_text=True,
+    )
+    await brave_registry.add_server(brave_config)
+    tools = list(brave_registry.get_all_tools().keys())
+    print(f"[SSE] Brave Search connected at {sse_url}")
+    print(f"      Tools: {tools}")
+    return brave_registry
+
+
+async def _setup_fs(cache_ttl: float, cache_max_size: int):
+    """Spawn the filesystem server over stdio and return its registry."""
+    mcp_server_script = os.path.join(os.path.dirname(__file__), "mcp_filesystem_server.py")
+    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    fs_config = MCPServerConfig(
+        name="filesystem",
+        transport="stdio",
+        command=sys.executable,
+        args=[mcp_server_script, project_dir],
+        timeout=30
+    )
+    fs_registry = CachedMCPToolRegistry(
+        tool_prefix="fs",
+        cache_ttl=cache_ttl,
+        cache_max_size=cache_max_size,
+        file_root=project_dir,
+        # A listing shows each child's size and modification time, which
+        # change without touching the directory's own mtime, so it is never
+        # served from the cache.
+        uncached_tools={"list_directory"},
+    )
+    await fs_registry.add_server(fs_config)
+    tools = list(fs_registry.get_all_tools().keys())
+    print(f"[stdio] Filesystem connected")
+    print(f"        Tools: {tools}")
+    return fs_registry
+
+
 async def setup_mcp_connections():
-    """Set up both SSE (Brave Search) and stdio (filesystem) MCP connections."""
-    from fairlib.modules.mcp.client.mcp_tool_registry import MCPToolRegistry
+    """Set up both SSE (Brave Search) and stdio (filesystem) MCP connections.
+
+    The SSE handshake and the stdio server spawn run concurrently, so setup
+    takes as long as the slower of the two rather than their sum.
+
+    Both servers are read-only, so their registries cache tool results:
+    repeated searches are served from ~/.cache/fairlib/mcp/ across runs, and
+    file reads are re-issued only when the file's modification time changes.
+    """
     from fairlib.modules.action.tools.composite_registry import CompositeToolRegistry
 
+    cache_ttl = settings.search_engine.web_search_cache_ttl
+    cache_max_size = settings.search_engine.web_search_cache_max_size
+
     print("\n" + "=" * 60)
     print("Setting up MCP Connections")
     print("=" * 60)
 
-    registries = []
-
-    # 1. Set up Brave Search via SSE
-    sse_url = os.environ.get("BRAVE_MCP_SSE_URL", DEFAULT_BRAVE_SSE_URL)
-    try:
-        brave_config = MCPServerConfig(
-            name="brave-search",
-            transport="sse",
-            url=sse_url,
-            timeout=30
-        )
-        brave_registry = MCPToolRegistry(tool_prefix="brave")
-        await brave_registry.add_server(brave_config)
-        tools = list(brave_registry.get_all_tools().keys())
-        print(f"[SSE] Brave Search connected at {sse_url}")
-        print(f"      Tools: {tools}")
-        registries.append(brave_registry)
-    except Exception as e:
-        print(f"[SSE] Brave Search not available: {e}")
+    # A server that fails to connect comes back as its exception, so one
+    # unavailable server does not cancel the other.
+    brave_registry, fs_registry = await asyncio.gather(
+        _setup_brave(cache_ttl, cache_max_size),
+        _setup_fs(cache_ttl, cache_max_size),
+        return_exceptions=True,
+    )
+    if isinstance(brave_registry, Exception):
+        print(f"[SSE] Brave Search not available: {brave_registry}")
         brave_registry = None
-
-    # 2. Set up Filesystem via stdio
-    mcp_server_script = os.path.join(os.path.dirname(__file__), "mcp_filesystem_server.py")
-    project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-    try:
-        fs_config = MCPServerConfig(
-            name="filesystem",
-            transport="stdio",
-            command=sys.executable,
-            args=[mcp_server_script, project_dir],
-            timeout=30
-        )
-        fs_registry = MCPToolRegistry(tool_prefix="fs")
-        await fs_registry.add_server(fs_config)
-        tools = list(fs_registry.get_all_tools().keys())
-        print(f"[stdio] Filesystem connected")
-        print(f"        Tools: {tools}")
-        registries.append(fs_registry)
-    except Exception as e:
-        print(f"[stdio] Filesystem not available: {e}")
+    if isinstance(fs_registry, Exception):
+        print(f"[stdio] Filesystem not available: {fs_registry}")
         fs_registry = None
 
     print("=" * 60)
 
+    registries = [r for r in (brave_registry, fs_registry) if r is not None]
     if not registries:
         return None, None, None
 
@@ -172,21 +224,48 @@ async def setup_mcp_connections():
     return combined, brave_registry, fs_registry
 
 
-async def run_agent_demo(llm, registry, query: str):
-    """Run the agent with a query and show the full agentic loop."""
-    print("\n" + "-" * 60)
-    print(f"QUERY: {query}")
-    print("-" * 60)
+def load_llm():
+    """Import and load the local model.
+
+    Importing HuggingFaceAdapter pulls in torch and transformers, which
+    takes seconds on its own, so the import happens here - in the same
+    worker thread as the weight load - rather than at module import.
+    fairlib loads each exported name's module on first access, so the
+    top-level `from fairlib import (...)` does not load the adapter.
+    """
+    from fairlib import HuggingFaceAdapter
+
+    return HuggingFaceAdapter("dolphin3-qwen25-3b", quantized=QUANTIZED)
+
 
-    # Create agent with MCP-optimized prompting
+def create_research_agent(llm, registry):
+    """Create the research agent with MCP-optimized prompting.
+
+    The agent is stateless (its memory is cleared at the start of every
+    run), so one instance serves every query.
+    """
     prompt_builder = create_research_agent_prompt_builder()
     planner = SimpleReActPlanner(llm, registry, prompt_builder=prompt_builder)
     executor = ToolExecutor(registry)
     memory = WorkingMemory()
-    agent = SimpleAgent(llm, planner, executor, memory, stateless=True, max_steps=5)
+    return SimpleAgent(llm, planner, executor, memory, stateless=True, max_steps=5)
+
+
+async def run_agent_demo(agent, query: str, cache=None):
+    """Run the agent with a query and show the full agentic loop.
+
+    With a SemanticCache, a query that means the same as an earlier one is
+    answered from the cache without running the agent.
+    """
+    print("\n" + "-" * 60)
+    print(f"QUERY: {query}")
+    print("-" * 60)
 
     # Run the agent
-    result = await agent.arun(query)
+    if cache is not None:
+        result = await cache.arun(agent, query)
+    else:
+        result = await agent.arun(query)
 
     print("\n" + "=" * 60)
     print("FINAL ANSWER:")
@@ -197,20 +276,47 @@ async def run_agent_demo(llm, registry, query: str):
     return result
 
 
-async def main():
-    """Main demo function."""
-    print("=" * 70)
-    print("       MCP Agent Tool Calling Demo")
-    print("       Demonstrating SSE + stdio MCP Integration")
-    print("=" * 70)
+async def run_batch_demo(agent, queries, cache=None):
+    """Run several queries concurrently and print the answers in order.
+
+    Each query runs on its own fork of the agent (see fork_agent), so the
+    runs cannot see each other's steps. At most AGENT_CONCURRENCY runs are
+    in flight at once.
+    """
+    semaphore = asyncio.Semaphore(AGENT_CONCURRENCY)
+
+    async def run_one(query: str):
+        async with semaphore:
+            runner = fork_agent(agent)
+            if cache is not None:
+                return await cache.arun(runner, query)
+            return await runner.arun(query)
+
+    print(f"\nRunning {len(queries)} queries concurrently...")
+    results = await asyncio.gather(*[run_one(q) for q in queries], return_exceptions=True)
+
+    for query, result in zip(queries, results):
+        print("\n" + "-" * 60)
+        print(f"QUERY: {query}")
+        print("-" * 60)
+        print(f"Error: {result}" if isinstance(result, Exception) else result)
+    print()
+    return results
 
-    # Initialize LLM
-    print("\nLoading LLM (Dolphin-3B)...")
-    llm = HuggingFaceAdapter("dolphin3-qwen25-3b")
 
-    # Set up MCP connections
-    combined_registry, brave_registry, fs_registry = await setup_mcp_connections()
+async def read_batch():
+    """Read queries, one per line, until a blank line."""
+    print("Enter one query per line (paste is fine); finish with a blank line.")
+    queries = []
+    while True:
+        line = (await ainput("... ")).strip()
+        if not line:
+            return queries
+        queries.append(line)
 
+
+async def run_session(llm, combined_registry, brave_registry, fs_registry):
+    """Run the preset queries, then the interactive loop."""
     if not combined_registry:
         print("\nERROR: No MCP servers available. Please start the Brave Search server:")
         print("  docker run -d -p 8080:8080 -e BRAVE_API_KEY=... shoofio/brave-search-mcp-sse:latest")
@@ -222,45 +328,106 @@ async def main():
     for name in all_tools.keys():
         print(f"  - {name}")
 
+    # Answers are cached per model and per tool set, so near-duplicate
+    # queries skip the agent, and an answer given while a server was down is
+    # not served once it is back. Answers that read files are not cached:
+    # the files can change.
+    tool_signature = ",".join(sorted(all_tools))
+    try:
+        cache = SemanticCache(
+            llm.model_name,
+            scope=hashlib.sha1(tool_signature.encode()).hexdigest()[:12],
+            uncached_tools=set(fs_registry.get_all_tools()) if fs_registry else set(),
+        )
+        print(f"Semantic cache: {len(cache)} entries at {cache.path}")
+    except Exception as e:
+        print(f"Semantic cache disabled: {e}")
+        cache = None
+
+    # One agent serves the preset queries and the interactive loop
+    agent = create_research_agent(llm, combined_registry)
+
     # Demo queries
     queries = [
         "Search the web for what is the Model Context Protocol (MCP)",
         "List the files in the current directory",
     ]
 
+    # Embed the preset queries in one batch up front, so their cache lookups
+    # below do not each run the embedder
+    if cache is not None:
+        await cache.embed_many(queries)
+
     # Only run queries for available tools
     if brave_registry:
-        await run_agent_demo(llm, combined_registry, queries[0])
+        await run_agent_demo(agent, queries[0], cache)
 
     if fs_registry:
-        await run_agent_demo(llm, combined_registry, queries[1])
+        await run_agent_demo(agent, queries[1], cache)
 
     # Interactive mode
     print("\n" + "=" * 70)
     print("Interactive Mode - Type your queries (or 'q' to quit)")
+    print("Type /batch to run several queries at once")
     print("=" * 70)
 
     while True:
         try:
-            user_input = input("\nQuery: ").strip()
+            # Read stdin off the event loop so it stays free while the user
+            # is typing.
+            user_input = (await ainput("\nQuery: ")).strip()
             if not user_input:
                 continue
             if user_input.lower() in ["exit", "quit", "q"]:
                 break
-            await run_agent_demo(llm, combined_registry, user_input)
-        except KeyboardInterrupt:
+            if user_input.lower() == "/batch":
+                queries = await read_batch()
+                if queries:
+                    await run_batch_demo(agent, queries, cache)
+                continue
+            await run_agent_demo(agent, user_input, cache)
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl-C into a cancellation of main()
             print("\n\nExiting...")
             break
         except Exception as e:
             print(f"Error: {e}")
 
-    # Cleanup
+
+async def main():
+    """Main demo function."""
+    print("=" * 70)
+    print("       MCP Agent Tool Calling Demo")
+    print("       Demonstrating SSE + stdio MCP Integration")
+    print("=" * 70)
+
+    # Load the LLM and connect the MCP servers at the same time. Importing
+    # torch and loading the weights is blocking work, so it runs in a worker
+    # thread while the event loop drives the MCP handshakes. If the model
+    # fails to load, the connections already made are closed.
+    print(f"\nLoading LLM (Dolphin-3B{', 4-bit' if QUANTIZED else ''})...")
+    llm, (combined_registry, brave_registry, fs_registry) = await load_alongside(
+        load_llm,
+        setup_mcp_connections(),
+        lambda connections: close_mcp_connections(*connections[1:]),
+    )
+
+    # Close the MCP connections however the session ends - quit, EOF,
+    # Ctrl-C or an error.
+    try:
+        await run_session(llm, combined_registry, brave_registry, fs_registry)
+    finally:
+        await close_mcp_connections(brave_registry, fs_registry)
+        print("Done!")
+
+
+async def close_mcp_connections(brave_registry, fs_registry):
+    """Close whichever MCP connections were made."""
     print("\nCleaning up MCP connections...")
     if fs_registry:
         await fs_registry.close_all()
     if brave_registry:
         await brave_registry.close_all()
-    print("Done!")
 
 
 if __name__ == "__main__":
@@ -29,6 +29,7 @@ allowing it to answer questions like:
 - "Read the README.md file and tell me what this project is about" (uses MCP)
 """
 import asyncio
+import hashlib
 import os
 import sys
 
@@ -46,6 +47,10 @@ from fairlib import (
 # Import MCP helper function
 from fairlib.modules.mcp import create_mcp_enhanced_registry
 
+# Answer cache and input helper shared by the MCP demos (sibling modules)
+from caching import SemanticCache
+from demo_helpers import ainput
+
 
 # Path to our Python-based MCP filesystem server
 MCP_SERVER_SCRIPT = os.path.join(os.path.dirname(__file__), "mcp_filesystem_server.py")
@@ -94,15 +99,18 @@ async def main():
             mcp_configs=mcp_configs,
             tool_prefix="mcp"
         )
-        print(f"Successfully connected! Available tools:")
-        for name in registry.get_all_tools().keys():
-            print(f"  - {name}")
+        print("Successfully connected!")
     except Exception as e:
         print(f"Warning: Could not connect to MCP server: {e}")
         print("Falling back to local tools only...")
         print("(Install MCP: pip install mcp)")
         registry = local_registry
 
+    # The composite registry merges its registries on every get_all_tools()
+    # call; the catalog is fixed once connected, so take it once.
+    tool_names = sorted(registry.get_all_tools())
+    print("Available tools:\n" + "\n".join(f"  - {name}" for name in tool_names))
+
     # --- Step 5: Create the agent components ---
     print("\nAssembling the agent...")
     executor = ToolExecutor(registry)
@@ -116,10 +124,30 @@ async def main():
         planner=planner,
         tool_executor=executor,
         memory=memory,
-        max_steps=10
+        max_steps=10,
+        # Each query is answered on its own. The answer cache below is keyed
+        # on the query alone, so a reply must not depend on earlier turns.
+        stateless=True,
     )
 
-    # --- Step 7: Interactive loop ---
+    # --- Step 7: Answer cache ---
+    # A query that means the same as an earlier one is answered from the
+    # cache without planning again. Entries are keyed on the model and on the
+    # tool names, so adding or losing a tool starts a fresh cache. Answers
+    # that used the MCP filesystem tools are not cached: the files can change.
+    tool_signature = ",".join(tool_names)
+    try:
+        cache = SemanticCache(
+            llm.model_name,
+            scope=hashlib.sha1(tool_signature.encode()).hexdigest()[:12],
+            uncached_tools=set(tool_names) - set(local_registry.get_all_tools()),
+        )
+        print(f"Semantic cache: {len(cache)} entries at {cache.path}")
+    except Exception as e:
+        print(f"Semantic cache disabled: {e}")
+        cache = None
+
+    # --- Step 8: Interactive loop ---
     print("\n" + "=" * 70)
     print("Agent ready! You can now interact with it.")
     print("=" * 70)
@@ -131,7 +159,9 @@ async def main():
 
     while True:
         try:
-            user_input = input("You: ").strip()
+            # Read stdin off the event loop so it keeps serving the MCP
+            # session while the user is typing.
+            user_input = (await ainput("You: ")).strip()
             if not user_input:
                 continue
             if user_input.lower() in ["exit", "quit", "q"]:
@@ -139,10 +169,14 @@ async def main():
                 break
 
             print("\nAgent is thinking...")
-            response = await agent.arun(user_input)
+            if cache is not None:
+                response = await cache.arun(agent, user_input)
+            else:
+                response = await agent.arun(user_input)
             print(f"\nAgent: {response}\n")
 
-        except KeyboardInterrupt:
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl-C into a cancellation of main()
             print("\n\nGoodbye!")
             break
         except Exception as e:
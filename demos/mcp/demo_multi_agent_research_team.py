@@ -49,10 +49,14 @@ PREREQUISITES:
 
 RUN:
     python demos/demo_multi_agent_research_team_showcase.py
+    python demos/demo_multi_agent_research_team_showcase.py --preset
+    python demos/demo_multi_agent_research_team_showcase.py --parallel
 
 ================================================================================
 """
 import asyncio
+import functools
+import hashlib
 import os
 import sys
 from typing import Optional
@@ -109,7 +113,12 @@ from fairlib import WorkingMemory
 #   HuggingFaceAdapter - Local transformer models (v4 AND v5 compatible)
 #   OllamaAdapter      - Local Ollama models
 #   LoadBalancerAdapter - Distributes requests across multiple adapters
-from fairlib import HuggingFaceAdapter
+#
+# HuggingFaceAdapter is the one import NOT made here: it pulls in torch and
+# transformers, which takes seconds, so load_llm() (Section 2) imports it in
+# the worker thread that loads the model. fairlib loads each exported name's
+# module on first access, so the other `from fairlib import ...` lines in
+# this file do not load the adapter (or torch) either.
 
 # --- 1h. Tool Components ---
 # Tools give agents the ability to interact with the world.
@@ -150,11 +159,36 @@ from fairlib.core.prompts import (
     EnhancedWorkerInstruction,  # Rich worker descriptions with capability details
 )
 
+# --- 1l. Demo helpers (demos/mcp/caching.py) ---
+# SemanticCache returns a stored final answer when a new request means the
+# same as an earlier one, skipping the whole team run.
+# CachedMCPToolRegistry is an MCPToolRegistry that serves repeated tool
+# calls (the same search twice) from a cache instead of the server.
+from caching import CachedMCPToolRegistry, SemanticCache
+from demo_helpers import ainput, fork_agent, load_alongside
+
 
 # ==============================================================================
 # SECTION 2: HELPER FUNCTIONS
 # ==============================================================================
 
+# How many runs of one worker may be in flight at once. Every worker shares
+# the same local LLM, so a small bound overlaps tool I/O (web searches)
+# without queueing more generations than the GPU can serve.
+MAX_WORKER_CONCURRENCY = 2
+
+# In the --parallel demo only, research findings shorter than this many words
+# are reported as-is instead of being rewritten by the Writer, saving a full
+# model pass. The default hierarchical run is not gated: there the manager
+# decides when to call the Writer, and its task is an instruction, not
+# finished text. Override with the WRITER_PASSTHROUGH_WORDS environment
+# variable (0 always runs the Writer).
+WRITER_PASSTHROUGH_WORDS = int(os.environ.get("WRITER_PASSTHROUGH_WORDS", "120"))
+
+# FAIR_LLM_DEMO_QUANTIZED=1 loads the model in 4-bit (see load_llm). It needs
+# CUDA and bitsandbytes, so it is off by default.
+QUANTIZED = os.environ.get("FAIR_LLM_DEMO_QUANTIZED", "").lower() in ("1", "true", "yes")
+
 def print_section(title: str, width: int = 70):
     """Print a formatted section header."""
     print("\n" + "=" * width)
@@ -177,14 +211,16 @@ async def setup_brave_search_mcp(url: Optional[str] = None):
     as an MCP tool — our agent doesn't need to know anything about the
     Brave API; it just sends a search query and gets results back.
 
+    Search results are cached (TTL and size from settings.search_engine)
+    and persisted to ~/.cache/fairlib/mcp/, so a repeated search skips the
+    network round trip, even after a restart.
+
     Returns:
         MCPToolRegistry if successful, None otherwise.
     """
     sse_url = url or os.environ.get("BRAVE_MCP_SSE_URL", "http://localhost:8080/sse")
 
     try:
-        from fairlib.modules.mcp.client.mcp_tool_registry import MCPToolRegistry
-
         mcp_config = MCPServerConfig(
             name="brave-search",
             transport="sse",
@@ -192,7 +228,13 @@ async def setup_brave_search_mcp(url: Optional[str] = None):
             timeout=30
         )
 
-        mcp_registry = MCPToolRegistry(tool_prefix="brave")
+        mcp_registry = CachedMCPToolRegistry(
+            tool_prefix="brave",
+            cache_ttl=settings.search_engine.web_search_cache_ttl,
+            cache_max_size=settings.search_engine.web_search_cache_max_size,
+            persist=True,
+            normalize_text=True,
+        )
         await mcp_registry.add_server(mcp_config)
         tools = list(mcp_registry.get_all_tools().keys())
         print(f"    Connected to Brave Search MCP (SSE): {tools}")
@@ -206,6 +248,58 @@ async def setup_brave_search_mcp(url: Optional[str] = None):
         return None
 
 
+async def close_brave_registry(brave_registry):
+    """Close the Brave Search MCP connection, if one was made."""
+    if brave_registry:
+        print("\n  Cleaning up MCP connections...")
+        await brave_registry.close_all()
+        print("    Brave Search (SSE) closed.")
+
+
+def load_llm():
+    """
+    Import and load the team's local model.
+
+    Qwen 2.5 14B Instruct: strong instruction following and JSON output,
+    which is critical for the manager's structured delegation format.
+
+    By default the full fp16 weights are loaded (fits on A6000/A100/etc.).
+    With FAIR_LLM_DEMO_QUANTIZED=1 they are loaded in 4-bit (bitsandbytes,
+    CUDA only): ~9 GB VRAM instead of ~28 GB, and decoding, which is bound
+    by memory bandwidth, moves a quarter of the bytes per token.
+    For smaller GPUs, try "qwen25-7b" or "dolphin3-qwen25-3b".
+
+    max_new_tokens=512 gives the model enough room to generate complete
+    JSON actions. The default (256) is too short when the system prompt
+    plus conversation history is long.
+    """
+    from fairlib import HuggingFaceAdapter
+
+    return HuggingFaceAdapter("qwen25-14b", quantized=QUANTIZED, max_new_tokens=512)
+
+
+async def arun_batch(agent, prompts, max_concurrency: int = MAX_WORKER_CONCURRENCY):
+    """
+    Run independent prompts through one worker concurrently.
+
+    Each prompt runs on its own fork of the worker (see fork_agent), so the
+    concurrent runs cannot see each other's steps. At most max_concurrency
+    runs are in flight at once.
+
+    Returns:
+        One result per prompt, in order; a failed run is returned as its
+        exception.
+    """
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_one(prompt: str):
+        async with semaphore:
+            runner = fork_agent(agent)
+            return await runner.arun(prompt)
+
+    return await asyncio.gather(*[run_one(p) for p in prompts], return_exceptions=True)
+
+
 def create_worker_agent(
     llm,
     tools,
@@ -266,6 +360,8 @@ def create_worker_agent(
         stateless=True,  # Workers clear memory between tasks
     )
     agent.role_description = role_description
+    # worker.arun_batch(prompts) fans independent sub-tasks out concurrently
+    agent.arun_batch = functools.partial(arun_batch, agent)
     return agent
 
 
@@ -273,10 +369,13 @@ def create_worker_agent(
 # SECTION 3: BUILDING THE RESEARCH TEAM
 # ==============================================================================
 
-async def build_research_team(llm):
+async def build_research_team(llm, brave_registry=None):
     """
     Construct a 3-worker research team with a manager coordinator.
 
+    brave_registry is the result of setup_brave_search_mcp(), which main()
+    runs while the LLM loads; None means Brave Search is unavailable.
+
     This function demonstrates:
     - Creating agents with different tool configurations
     - MCP integration for external web search
@@ -290,12 +389,10 @@ async def build_research_team(llm):
     # ------------------------------------------------------------------
     # Step 1: Set up MCP for the Researcher's web search
     # ------------------------------------------------------------------
-    print_step(1, "Connecting to external MCP servers")
-    print("    Attempting to connect to Brave Search MCP server...")
+    print_step(1, "Checking external MCP servers")
+    print("    Brave Search MCP was connected while the LLM loaded (step 0).")
     print("    (This uses someone ELSE's web search tool via MCP!)")
 
-    brave_registry = await setup_brave_search_mcp()
-
     # Determine what search capability we have
     has_brave_search = brave_registry is not None
     has_google_search = (
@@ -588,14 +685,21 @@ async def build_research_team(llm):
     )
     print("    Team assembled!")
 
-    return team, brave_registry
+    return team, workers, brave_registry
 
 
 # ==============================================================================
 # SECTION 4: RUNNING THE DEMO
 # ==============================================================================
 
-async def run_preset_demo(team):
+async def run_team(team, query: str, cache=None):
+    """Run the team on a query, answering from the semantic cache when possible."""
+    if cache is not None:
+        return await cache.arun(team, query)
+    return await team.arun(query)
+
+
+async def run_preset_demo(team, cache=None):
     """Run a preset query to showcase the team in action."""
     print_section("RUNNING PRESET DEMO QUERY")
 
@@ -608,7 +712,52 @@ async def run_preset_demo(team):
     print(f"\n  Query: {query}\n")
     print("-" * 70)
 
-    result = await team.arun(query)
+    result = await run_team(team, query, cache)
+
+    print("\n" + "=" * 70)
+    print("  FINAL RESEARCH REPORT")
+    print("=" * 70)
+    print(result)
+    return result
+
+
+async def run_parallel_demo(workers):
+    """
+    Run independent research sub-tasks concurrently, then write them up.
+
+    The manager delegates one sub-task at a time. When a request splits into
+    searches that do not depend on each other, they can instead go to the
+    Researcher together through arun_batch, and the Writer combines the
+    findings (unless they are already short enough to report as-is).
+
+    This is the only path the WRITER_PASSTHROUGH_WORDS gate covers; the
+    default hierarchical run always lets the manager's Writer task run.
+    """
+    print_section("RUNNING PARALLEL RESEARCH DEMO")
+
+    topics = [
+        "Find the latest trends in AI agents",
+        "Find the latest trends in quantum computing",
+    ]
+    for topic in topics:
+        print(f"\n  Sub-task: {topic}")
+    print("-" * 70)
+
+    findings = await workers["Researcher"].arun_batch(topics)
+
+    notes = []
+    for topic, finding in zip(topics, findings):
+        if isinstance(finding, Exception):
+            finding = f"Research failed: {finding}"
+        notes.append(f"{topic}:\n{finding}")
+    notes = "\n\n".join(notes)
+    if len(notes.split()) < WRITER_PASSTHROUGH_WORDS:
+        print("\n  Findings are already short; skipping the Writer.")
+        result = notes
+    else:
+        result = await workers["Writer"].arun(
+            f"Write a brief report comparing these research findings:\n\n{notes}"
+        )
 
     print("\n" + "=" * 70)
     print("  FINAL RESEARCH REPORT")
@@ -617,7 +766,7 @@ async def run_preset_demo(team):
     return result
 
 
-async def run_interactive(team):
+async def run_interactive(team, cache=None):
     """Run in interactive mode, accepting queries from the user."""
     print_section("INTERACTIVE MODE")
     print("\n  The research team is ready for your queries!")
@@ -634,7 +783,9 @@ async def run_interactive(team):
 
     while True:
         try:
-            user_input = input("  Research Request: ").strip()
+            # Read stdin off the event loop so it stays free while the user
+            # is typing.
+            user_input = (await ainput("  Research Request: ")).strip()
             if not user_input:
                 continue
             if user_input.lower() in ["exit", "quit", "q"]:
@@ -642,7 +793,7 @@ async def run_interactive(team):
                 break
 
             print("\n" + "-" * 70)
-            result = await team.arun(user_input)
+            result = await run_team(team, user_input, cache)
 
             print("\n" + "=" * 70)
             print("  FINAL RESEARCH REPORT")
@@ -650,7 +801,8 @@ async def run_interactive(team):
             print(result)
             print()
 
-        except KeyboardInterrupt:
+        except (EOFError, KeyboardInterrupt, asyncio.CancelledError):
+            # asyncio.run turns Ctrl-C into a cancellation of main()
             print("\n\n  Interrupted. Goodbye!")
             break
         except Exception as e:
@@ -688,35 +840,57 @@ async def main():
     print("    (You could swap this for OpenAIAdapter, AnthropicAdapter, or")
     print("     OllamaAdapter without changing ANY agent code.)")
 
-    # Qwen 2.5 14B Instruct: strong instruction following and JSON output,
-    # which is critical for the manager's structured delegation format.
-    # Requires ~28 GB VRAM in fp16 (fits on A6000/A100/etc.).
-    # For smaller GPUs, try "qwen25-7b" (~14 GB) or "dolphin3-qwen25-3b" (~6 GB).
-    #
-    # max_new_tokens=512 gives the model enough room to generate complete
-    # JSON actions. The default (256) is too short when the system prompt
-    # plus conversation history is long.
-    llm = HuggingFaceAdapter("qwen25-14b", max_new_tokens=512)
+    # Importing torch and loading the weights (see load_llm) is slow,
+    # blocking work, so it runs in a worker thread while the event loop
+    # connects to Brave Search over MCP; startup takes as long as the slower
+    # of the two instead of their sum. If the model fails to load, the Brave
+    # connection is closed before the error propagates.
+    print("    Connecting to Brave Search MCP while the model loads...")
+    llm, brave_registry = await load_alongside(
+        load_llm,
+        setup_brave_search_mcp(),
+        close_brave_registry,
+    )
     print(f"    LLM ready: {llm.model_name}")
 
     # ------------------------------------------------------------------
     # Build and run the team
     # ------------------------------------------------------------------
-    team, brave_registry = await build_research_team(llm)
-
-    # Choose mode based on command-line args
-    if "--preset" in sys.argv:
-        await run_preset_demo(team)
-    else:
-        await run_interactive(team)
+    team, workers, brave_registry = await build_research_team(llm, brave_registry)
+
+    # Final answers are cached per model name, so a repeated or reworded
+    # request is answered without running the team again. The cache is also
+    # keyed on the workers' tools, so an answer given while Brave Search was
+    # down is not served once it is back.
+    tool_signature = ",".join(sorted(
+        name
+        for worker in workers.values()
+        for name in worker.tool_executor.tool_registry.get_all_tools()
+    ))
+    try:
+        cache = SemanticCache(
+            llm.model_name,
+            scope=hashlib.sha1(tool_signature.encode()).hexdigest()[:12],
+        )
+        print(f"    Semantic cache: {len(cache)} entries at {cache.path}")
+    except Exception as e:
+        print(f"    Semantic cache disabled: {e}")
+        cache = None
 
-    # ------------------------------------------------------------------
-    # Cleanup MCP connections
-    # ------------------------------------------------------------------
-    if brave_registry:
-        print("\n  Cleaning up MCP connections...")
-        await brave_registry.close_all()
-        print("    Brave Search (SSE) closed.")
+    # Choose mode based on command-line args. The MCP connection is closed
+    # however the run ends - quit, EOF, Ctrl-C or an error.
+    try:
+        if "--preset" in sys.argv:
+            await run_preset_demo(team, cache)
+        elif "--parallel" in sys.argv:
+            await run_parallel_demo(workers)
+        else:
+            await run_interactive(team, cache)
+    finally:
+        # --------------------------------------------------------------
+        # Cleanup MCP connections
+        # --------------------------------------------------------------
+        await close_brave_registry(brave_registry)
 
     print_section("DEMO COMPLETE")
     print("""
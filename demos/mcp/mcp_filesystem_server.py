@@ -14,16 +14,96 @@ Usage:
 The server runs via stdio and can be used with any MCP client.
 """
 import asyncio
+import codecs
 import os
 import sys
-from datetime import datetime
+import time
+from functools import lru_cache
 from pathlib import Path
+from stat import S_ISDIR, S_ISREG
 from typing import Any
 
 from mcp.server import Server
 from mcp.server.stdio import stdio_server
 from mcp.types import Tool, TextContent
 
+# Upper bound on how much of a file read_file loads, whatever max_lines is.
+MAX_READ_BYTES = 1_000_000
+# read_file reads in chunks of this size and stops once it has enough lines.
+READ_CHUNK_BYTES = 64 * 1024
+# The codec is looked up once. Each read builds its own decoder from this
+# class, since reads run concurrently in worker threads.
+_Utf8Decoder = codecs.getincrementaldecoder("utf-8")
+
+
+@lru_cache(maxsize=8)
+def _build_tools(allowed_path: str) -> tuple[Tool, ...]:
+    """
+    Build the tool definitions for a server rooted at allowed_path.
+
+    The descriptions depend only on the root, so servers created for the
+    same directory in one process share the same Tool objects.
+    """
+    return (
+        Tool(
+            name="list_directory",
+            description=(
+                "List files and directories in a specified path. "
+                "Returns names, types (file/directory), and sizes. "
+                f"All paths are relative to: {allowed_path}"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Directory path to list (relative or absolute within allowed area). Use '.' for current directory."
+                    }
+                },
+                "required": ["path"]
+            }
+        ),
+        Tool(
+            name="read_file",
+            description=(
+                "Read the contents of a text file. "
+                "Returns the file content as text. "
+                f"All paths are relative to: {allowed_path}"
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path to the file to read"
+                    },
+                    "max_lines": {
+                        "type": "integer",
+                        "description": "Maximum number of lines to read (default: 100)"
+                    }
+                },
+                "required": ["path"]
+            }
+        ),
+        Tool(
+            name="get_file_info",
+            description=(
+                "Get metadata about a file or directory. "
+                "Returns size, modification time, and type."
+            ),
+            inputSchema={
+                "type": "object",
+                "properties": {
+                    "path": {
+                        "type": "string",
+                        "description": "Path to the file or directory"
+                    }
+                },
+                "required": ["path"]
+            }
+        )
+    )
+
 
 def create_filesystem_server(allowed_directory: str) -> Server:
     """
@@ -42,122 +122,153 @@ def create_filesystem_server(allowed_directory: str) -> Server:
     def is_path_allowed(path: str) -> bool:
         """Check if a path is within the allowed directory."""
         try:
-            resolved = Path(path).resolve()
-            return str(resolved).startswith(str(allowed_path))
+            return Path(path).resolve().is_relative_to(allowed_path)
         except Exception:
             return False
 
     def resolve_path(path: str) -> Path:
         """Resolve a path relative to the allowed directory."""
+        # Resolved on every call: a cached answer would miss a symlink
+        # created after it was cached.
         if os.path.isabs(path):
             resolved = Path(path).resolve()
         else:
             resolved = (allowed_path / path).resolve()
 
-        if not str(resolved).startswith(str(allowed_path)):
+        # is_relative_to compares whole path components, so a sibling such as
+        # "/data-old" is not accepted as being inside "/data".
+        if not resolved.is_relative_to(allowed_path):
             raise PermissionError("Access denied: path outside allowed directory")
 
         return resolved
 
+    # Built once per server; list_tools hands back the same list every call.
+    tools = list(_build_tools(str(allowed_path)))
+
     @server.list_tools()
     async def list_tools() -> list[Tool]:
         """Return the list of available tools."""
-        return [
-            Tool(
-                name="list_directory",
-                description=(
-                    "List files and directories in a specified path. "
-                    "Returns names, types (file/directory), and sizes. "
-                    f"All paths are relative to: {allowed_path}"
-                ),
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "Directory path to list (relative or absolute within allowed area). Use '.' for current directory."
-                        }
-                    },
-                    "required": ["path"]
-                }
-            ),
-            Tool(
-                name="read_file",
-                description=(
-                    "Read the contents of a text file. "
-                    "Returns the file content as text. "
-                    f"All paths are relative to: {allowed_path}"
-                ),
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "Path to the file to read"
-                        },
-                        "max_lines": {
-                            "type": "integer",
-                            "description": "Maximum number of lines to read (default: 100)"
-                        }
-                    },
-                    "required": ["path"]
-                }
-            ),
-            Tool(
-                name="get_file_info",
-                description=(
-                    "Get metadata about a file or directory. "
-                    "Returns size, modification time, and type."
-                ),
-                inputSchema={
-                    "type": "object",
-                    "properties": {
-                        "path": {
-                            "type": "string",
-                            "description": "Path to the file or directory"
-                        }
-                    },
-                    "required": ["path"]
-                }
-            )
-        ]
+        return tools
 
     @server.call_tool()
     async def call_tool(name: str, arguments: dict[str, Any]) -> list[TextContent]:
         """Handle tool calls."""
+        handler = _HANDLERS.get(name)
+        if handler is None:
+            return [TextContent(type="text", text=f"Unknown tool: {name}")]
         try:
-            if name == "list_directory":
-                return await handle_list_directory(arguments, resolve_path)
-            elif name == "read_file":
-                return await handle_read_file(arguments, resolve_path)
-            elif name == "get_file_info":
-                return await handle_get_file_info(arguments, resolve_path)
-            else:
-                return [TextContent(type="text", text=f"Unknown tool: {name}")]
+            return await handler(arguments, resolve_path)
         except Exception as e:
             return [TextContent(type="text", text=f"Error: {str(e)}")]
 
     return server
 
 
+def _format_entry(entry: os.DirEntry) -> str:
+    """Format one line of a directory listing."""
+    if entry.is_dir():
+        return f"  [dir] {entry.name}"
+    if entry.is_file():
+        return f"  [file] {entry.name} ({entry.stat().st_size} bytes)"
+    return f"  [file] {entry.name}"
+
+
+def _list_directory(dir_path: Path, path: str) -> str:
+    """Format a directory listing (blocking; run in a worker thread)."""
+    # One stat() answers both "does it exist" and "is it a directory".
+    try:
+        st = os.stat(dir_path)
+    except FileNotFoundError:
+        return f"Directory not found: {path}"
+    if not S_ISDIR(st.st_mode):
+        return f"Not a directory: {path}"
+
+    # scandir gets each entry's type from the directory read itself, so only
+    # files need a stat() call (for their size).
+    with os.scandir(dir_path) as it:
+        entries_raw = sorted(it, key=lambda e: e.name)
+
+    entries = [_format_entry(entry) for entry in entries_raw]
+
+    return f"Contents of {dir_path}:\n" + "\n".join(entries) if entries else f"Directory {dir_path} is empty"
+
+
+def _read_lines(file_path: Path, path: str, max_lines: int) -> str:
+    """Read up to max_lines lines of a text file (blocking; run in a worker thread)."""
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return f"File not found: {path}"
+    if not S_ISREG(st.st_mode):
+        return f"Not a file: {path}"
+
+    # Read raw chunks only until there are enough lines (or the byte cap is
+    # hit), then decode and split once. The decoder is incremental so a
+    # multi-byte character cut off by an early stop is dropped, not an error.
+    buf = bytearray()
+    newlines = 0
+    with open(file_path, 'rb') as f:
+        while newlines <= max_lines and len(buf) < MAX_READ_BYTES:
+            chunk = f.read(min(READ_CHUNK_BYTES, MAX_READ_BYTES - len(buf)))
+            if not chunk:
+                break
+            newlines += chunk.count(b"\n")
+            buf += chunk
+
+    complete = len(buf) >= st.st_size
+    try:
+        text = _Utf8Decoder().decode(buf, final=complete)
+    except UnicodeDecodeError:
+        return f"Error: {path} is not a text file"
+
+    lines = text.splitlines()
+    if len(lines) > max_lines:
+        lines = lines[:max_lines]
+        lines.append(f"\n... (truncated at {max_lines} lines)")
+    elif not complete:
+        lines.append(f"\n... (truncated at {MAX_READ_BYTES} bytes)")
+
+    content = "\n".join(lines)
+    return f"Contents of {file_path.name}:\n\n{content}"
+
+
+@lru_cache(maxsize=512)
+def _format_mtime(mtime: int) -> str:
+    """Format a modification time (whole seconds) as local ISO 8601."""
+    # Files in a fresh checkout share a handful of timestamps, so most
+    # lookups are cache hits.
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(mtime))
+
+
+def _file_info(file_path: Path, path: str) -> str:
+    """Format the metadata of a file or directory (blocking; run in a worker thread)."""
+    # Existence, type, size and mtime all come from a single stat().
+    try:
+        st = os.stat(file_path)
+    except FileNotFoundError:
+        return f"Path not found: {path}"
+    file_type = "directory" if S_ISDIR(st.st_mode) else "file"
+    mod_time = _format_mtime(int(st.st_mtime))
+
+    info = [
+        f"Path: {file_path}",
+        f"Type: {file_type}",
+        f"Size: {st.st_size} bytes",
+        f"Modified: {mod_time}",
+    ]
+    return "\n".join(info)
+
+
+# The handlers below run on the server's event loop. All filesystem access
+# happens in the sync helpers above, which are run via asyncio.to_thread so a
+# slow disk or a large file does not stall other requests on the same session.
+
 async def handle_list_directory(arguments: dict, resolve_path) -> list[TextContent]:
     """List contents of a directory."""
     path = arguments.get("path", ".")
     dir_path = resolve_path(path)
 
-    if not dir_path.exists():
-        return [TextContent(type="text", text=f"Directory not found: {path}")]
-
-    if not dir_path.is_dir():
-        return [TextContent(type="text", text=f"Not a directory: {path}")]
-
-    entries = []
-    for entry in sorted(dir_path.iterdir()):
-        entry_type = "dir" if entry.is_dir() else "file"
-        size = entry.stat().st_size if entry.is_file() else 0
-        entries.append(f"  [{entry_type}] {entry.name}" + (f" ({size} bytes)" if entry.is_file() else ""))
-
-    result = f"Contents of {dir_path}:\n" + "\n".join(entries) if entries else f"Directory {dir_path} is empty"
+    result = await asyncio.to_thread(_list_directory, dir_path, path)
     return [TextContent(type="text", text=result)]
 
 
@@ -171,25 +282,8 @@ async def handle_read_file(arguments: dict, resolve_path) -> list[TextContent]:
 
     file_path = resolve_path(path)
 
-    if not file_path.exists():
-        return [TextContent(type="text", text=f"File not found: {path}")]
-
-    if not file_path.is_file():
-        return [TextContent(type="text", text=f"Not a file: {path}")]
-
-    try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = []
-            for i, line in enumerate(f):
-                if i >= max_lines:
-                    lines.append(f"\n... (truncated at {max_lines} lines)")
-                    break
-                lines.append(line.rstrip())
-
-        content = "\n".join(lines)
-        return [TextContent(type="text", text=f"Contents of {file_path.name}:\n\n{content}")]
-    except UnicodeDecodeError:
-        return [TextContent(type="text", text=f"Error: {path} is not a text file")]
+    result = await asyncio.to_thread(_read_lines, file_path, path, max_lines)
+    return [TextContent(type="text", text=result)]
 
 
 async def handle_get_file_info(arguments: dict, resolve_path) -> list[TextContent]:
@@ -201,21 +295,17 @@ async def handle_get_file_info(arguments: dict, resolve_path) -> list[TextConten
 
     file_path = resolve_path(path)
 
-    if not file_path.exists():
-        return [TextContent(type="text", text=f"Path not found: {path}")]
-
-    stat = file_path.stat()
-    file_type = "directory" if file_path.is_dir() else "file"
-    mod_time = datetime.fromtimestamp(stat.st_mtime).isoformat()
+    info = await asyncio.to_thread(_file_info, file_path, path)
+    return [TextContent(type="text", text=info)]
 
-    info = [
-        f"Path: {file_path}",
-        f"Type: {file_type}",
-        f"Size: {stat.st_size} bytes",
-        f"Modified: {mod_time}",
-    ]
 
-    return [TextContent(type="text", text="\n".join(info))]
+# Tool name -> handler. A new tool needs its handler added here and its Tool
+# entry added in _build_tools.
+_HANDLERS = {
+    "list_directory": handle_list_directory,
+    "read_file": handle_read_file,
+    "get_file_info": handle_get_file_info,
+}
 
 
 async def main():